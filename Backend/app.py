@@ -6,46 +6,207 @@ Supports PostgreSQL (Docker) and SQLite (local dev) via DATABASE_URL env var.
   Local dev: (no env var)                                        → SQLite
 """
 
+import hashlib
 import json
 import os
+import queue
+import socket
+import sqlite3
+import threading
 import time
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+try:
+    import orjson
+except ImportError:     # optional: plain `python app.py` still works without it
+    orjson = None
+
+# ── JSON codec ────────────────────────────────────────────────────────────────
+
+if orjson:
+    def dumps(data):
+        return orjson.dumps(data, option=orjson.OPT_NAIVE_UTC)
+    loads = orjson.loads
+else:
+    def dumps(data):
+        return json.dumps(data).encode()
+    loads = json.loads
 
 # ── Database adapter ──────────────────────────────────────────────────────────
 
+def _cpu_limit():
+    """CPUs this process may really use: the cgroup quota, else its affinity.
+
+    Inside a container os.cpu_count() reports the host's cores, which would
+    size every replica's PostgreSQL pool for a machine it doesn't get.
+    """
+    try:                                                    # cgroup v2
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return -(-int(quota) // int(period))
+    except (OSError, ValueError):
+        try:                                                # cgroup v1
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if quota > 0:
+                return -(-quota // period)
+        except (OSError, ValueError):
+            pass
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
 DATABASE_URL = os.environ.get("DATABASE_URL")
+DB_PATH      = "todos.db"
+# Connections per process; every replica opens this many to PostgreSQL
+POOL_SIZE    = int(os.environ.get("POOL_SIZE") or max(4, _cpu_limit()))
+DB_WAIT      = 20   # seconds init_db() waits for PostgreSQL to come up
+MAX_ID       = 2**63 - 1   # SQLite INTEGER range; larger ids can't exist
+
+# INSERT/UPDATE … RETURNING: always on PostgreSQL, SQLite from 3.35
+RETURNING = bool(DATABASE_URL) or sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_POOL = None   # created by init_db(): queue.Queue (SQLite) or ThreadedConnectionPool
+
+# SQLite allows one writer at a time, so every write is queued to a single
+# writer thread that owns its own connection; reads are spread over the pool.
+# Writes that pile up while a commit runs are applied together and committed
+# once (group commit), each inside its own savepoint.
+_WRITER       = None
+_WRITES       = queue.Queue()
+WRITE_BATCH   = 64
+WRITE_TIMEOUT = 10   # seconds a request waits for the writer before giving up
+
+# Per-connection tuning. With WAL, synchronous=NORMAL fsyncs at checkpoints
+# instead of on every commit; mmap lets reads skip pread() syscalls.
+SQLITE_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA mmap_size=268435456;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-20000;
+    PRAGMA busy_timeout=5000;
+"""
 
-def get_db():
+def _sqlite_connect(**kwargs):
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, **kwargs)
+    conn.executescript(SQLITE_PRAGMAS)
+    return conn
+
+def open_pool():
+    """Open POOL_SIZE connections up front so requests only pay for a queue pop."""
+    global _POOL
     if DATABASE_URL:
-        import psycopg2
-        conn = psycopg2.connect(DATABASE_URL)
-        conn.autocommit = False
-        return conn
+        from psycopg2.pool import ThreadedConnectionPool
+        # minconn=maxconn: psycopg2 closes returned connections beyond minconn,
+        # which would reconnect on every request above that concurrency
+        _POOL = ThreadedConnectionPool(minconn=POOL_SIZE, maxconn=POOL_SIZE, dsn=DATABASE_URL)
     else:
-        import sqlite3
-        conn = sqlite3.connect("todos.db")
-        conn.row_factory = sqlite3.Row
-        return conn
+        global _WRITER
+        writer = _sqlite_connect(isolation_level=None)   # _write_loop issues BEGIN/COMMIT
+        writer.execute("PRAGMA journal_mode=WAL")   # persistent: stored in the file, set once
+        pool = queue.Queue(maxsize=POOL_SIZE)
+        for _ in range(POOL_SIZE):
+            pool.put(_sqlite_connect())
+        _WRITER, _POOL = writer, pool
+        threading.Thread(target=_write_loop, name="sqlite-writer", daemon=True).start()
 
-def fetchall(conn, sql, params=()):
-    cur = conn.cursor()
-    cur.execute(sql, params)
-    rows = cur.fetchall()
+@contextmanager
+def borrow(write=False):
+    """Lend a pooled connection; commits on success, rolls back on error.
+
+    Writes go through write(), which uses write=True on PostgreSQL. Reads run
+    in autocommit there, skipping the BEGIN/COMMIT round-trips.
+    """
+    if DATABASE_URL:
+        conn = _POOL.getconn()
+        try:
+            conn.autocommit = not write
+            with conn:
+                yield conn
+        finally:
+            _POOL.putconn(conn)
+    else:
+        conn = _POOL.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            _POOL.put(conn)
+
+def write(op, *args):
+    """Run op(conn, *args) in a write transaction and return its result."""
     if DATABASE_URL:
-        cols = [d[0] for d in cur.description]
-        return [dict(zip(cols, r)) for r in rows]
-    return [dict(r) for r in rows]
+        with borrow(write=True) as conn:
+            return op(conn, *args)
+    done = Future()
+    _WRITES.put((op, args, done))
+    return done.result(timeout=WRITE_TIMEOUT)
+
+def _write_batch(conn, batch):
+    """Apply one batch in a single transaction; return (future, result, error) triples."""
+    if conn.in_transaction:   # left open by an earlier failure
+        conn.execute("ROLLBACK")
+    results = []
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for op, args, done in batch:
+            conn.execute("SAVEPOINT op")
+            try:
+                results.append((done, op(conn, *args), None))
+            except Exception as e:   # undo just this op; the rest of the batch commits
+                conn.execute("ROLLBACK TO op")
+                results.append((done, None, e))
+            conn.execute("RELEASE op")
+        conn.execute("COMMIT")
+    except Exception as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        results = [(done, None, e) for _, _, done in batch]
+    return results
+
+def _write_loop():
+    conn = _WRITER
+    while True:
+        batch = [_WRITES.get()]
+        while len(batch) < WRITE_BATCH:
+            try:
+                batch.append(_WRITES.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            results = _write_batch(conn, batch)
+        except Exception as e:   # e.g. ROLLBACK failed too: fail the batch, keep the writer alive
+            results = [(done, None, e) for _, _, done in batch]
+        for done, result, error in results:
+            if error is None:
+                done.set_result(result)
+            else:
+                done.set_exception(error)
+
+# Every query selects these columns in this order (see COLUMNS below), so
+# both drivers hand back plain tuples and rows are mapped by position.
+_TODO_COLS = ("id", "title", "completed", "created")
+
+def _row_to_dict(r):
+    return {"id": r[0], "title": r[1], "completed": r[2], "created": r[3]}
+
+def dump_rows(cur):
+    """Encode a todos cursor as a JSON array straight from the driver's rows."""
+    return b"[" + b",".join(dumps(_row_to_dict(r)) for r in cur) + b"]"
 
 def fetchone(conn, sql, params=()):
     cur = conn.cursor()
     cur.execute(sql, params)
     row = cur.fetchone()
-    if row is None:
-        return None
-    if DATABASE_URL:
-        cols = [d[0] for d in cur.description]
-        return dict(zip(cols, row))
-    return dict(row)
+    return None if row is None else _row_to_dict(row)
 
 def execute(conn, sql, params=()):
     cur = conn.cursor()
@@ -56,143 +217,347 @@ def P():
     """Parameter placeholder: %s for PostgreSQL, ? for SQLite."""
     return "%s" if DATABASE_URL else "?"
 
-def init_db():
-    """Create todos table, retrying to handle Docker startup ordering."""
-    for attempt in range(10):
+# Built once: the hot path only binds parameters, and the identical strings
+# hit sqlite3's per-connection prepared-statement cache on every request.
+# PostgreSQL formats `created` itself so no datetime objects reach the JSON
+# encoder; SQLite already stores it as TEXT.
+if DATABASE_URL:
+    COLUMNS = ("id, title, completed, "
+               "to_char(created AT TIME ZONE 'UTC', 'YYYY-MM-DD\"T\"HH24:MI:SS\"Z\"') AS created")
+else:
+    COLUMNS = ", ".join(_TODO_COLS)
+_ph     = P()
+SQL = {
+    # todos.created: the column (and its index), not the formatted alias
+    "list":   f"SELECT {COLUMNS} FROM todos ORDER BY todos.created DESC",
+    "get":    f"SELECT {COLUMNS} FROM todos WHERE id={_ph}",
+    "insert": f"INSERT INTO todos (title) VALUES ({_ph})",
+    "update": f"UPDATE todos SET title=COALESCE({_ph}, title), completed=COALESCE({_ph}, completed) WHERE id={_ph}",
+    "delete": f"DELETE FROM todos WHERE id={_ph}",
+}
+SQL["insert_returning"] = f"{SQL['insert']} RETURNING {COLUMNS}"
+SQL["update_returning"] = f"{SQL['update']} RETURNING {COLUMNS}"
+
+# Write operations; run them through write()
+
+def create_schema(conn):
+    if DATABASE_URL:
+        execute(conn, """
+            CREATE TABLE IF NOT EXISTS todos (
+                id        SERIAL PRIMARY KEY,
+                title     TEXT        NOT NULL,
+                completed BOOLEAN     NOT NULL DEFAULT FALSE,
+                created   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+        execute(conn, "CREATE INDEX IF NOT EXISTS idx_todos_created ON todos (created DESC)")
+    else:
+        execute(conn, """
+            CREATE TABLE IF NOT EXISTS todos (
+                id        INTEGER PRIMARY KEY AUTOINCREMENT,
+                title     TEXT    NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                created   TEXT    NOT NULL DEFAULT (datetime('now'))
+            )
+        """)
+        execute(conn, "CREATE INDEX IF NOT EXISTS idx_todos_created ON todos (created DESC)")
+
+def insert_todo(conn, title):
+    if RETURNING:
+        return fetchone(conn, SQL["insert_returning"], (title,))
+    cur = execute(conn, SQL["insert"], (title,))
+    return fetchone(conn, SQL["get"], (cur.lastrowid,))
+
+def update_todo(conn, todo_id, title, completed):
+    # Omitted fields keep their stored value via COALESCE, so no pre-read is needed
+    if RETURNING:
+        return fetchone(conn, SQL["update_returning"], (title, completed, todo_id))
+    cur = execute(conn, SQL["update"], (title, completed, todo_id))
+    return cur.rowcount and fetchone(conn, SQL["get"], (todo_id,))
+
+def delete_todo(conn, todo_id):
+    return execute(conn, SQL["delete"], (todo_id,)).rowcount
+
+def _wait_for_db():
+    """Open the PostgreSQL pool, polling the port while Docker brings the DB up.
+
+    A refused TCP connect costs microseconds, so polling every 100 ms finds the
+    server almost as soon as it listens; the pool is only tried once it does.
+    """
+    url  = urlparse(DATABASE_URL)
+    addr = (url.hostname or "localhost", url.port or 5432)
+    deadline = time.monotonic() + DB_WAIT
+    waiting  = False
+    while True:
         try:
-            with get_db() as conn:
-                if DATABASE_URL:
-                    execute(conn, """
-                        CREATE TABLE IF NOT EXISTS todos (
-                            id        SERIAL PRIMARY KEY,
-                            title     TEXT        NOT NULL,
-                            completed BOOLEAN     NOT NULL DEFAULT FALSE,
-                            created   TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                        )
-                    """)
-                    conn.commit()
-                else:
-                    execute(conn, """
-                        CREATE TABLE IF NOT EXISTS todos (
-                            id        INTEGER PRIMARY KEY AUTOINCREMENT,
-                            title     TEXT    NOT NULL,
-                            completed INTEGER NOT NULL DEFAULT 0,
-                            created   TEXT    NOT NULL DEFAULT (datetime('now'))
-                        )
-                    """)
-                    conn.commit()
-            db_label = ("PostgreSQL → " + DATABASE_URL.split("@")[-1]) if DATABASE_URL else "SQLite → todos.db"
-            print(f"✅  Database ready  ({db_label})")
+            socket.create_connection(addr, timeout=0.5).close()
+            open_pool()
             return
-        except Exception as e:
-            print(f"⏳  Waiting for DB… attempt {attempt + 1}/10  ({e})")
-            time.sleep(2)
-    raise RuntimeError("Could not connect to database after 10 attempts.")
+        except Exception as e:   # not listening yet, or still starting up
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"Could not connect to database within {DB_WAIT}s ({e})") from e
+            if not waiting:
+                print(f"⏳  Waiting for DB at {addr[0]}:{addr[1]}…  ({e})")
+                waiting = True
+            time.sleep(0.1)
+
+def init_db():
+    """Create todos table; SQLite is a local file, so only PostgreSQL is waited for."""
+    if DATABASE_URL:
+        _wait_for_db()
+    else:
+        open_pool()
+    write(create_schema)
+    db_label = ("PostgreSQL → " + DATABASE_URL.split("@")[-1]) if DATABASE_URL else f"SQLite → {DB_PATH}"
+    print(f"✅  Database ready  ({db_label})")
+
+# ── Response cache ────────────────────────────────────────────────────────────
+
+# Encoded GET bodies, dropped on every write. This is only safe while this
+# process is the sole writer, i.e. SQLite; a PostgreSQL database can be shared
+# by several backend replicas (k8s prod runs three), so it always reads through.
+CACHE_ENABLED = not DATABASE_URL
+CACHE_MAX     = 1024
+
+_LIST_CACHE = None            # (etag, body) of GET /todos
+_ITEM_CACHE = OrderedDict()   # id → body of GET /todos/<id>, least recent first
+_CACHE_GEN  = 0               # bumped on every write so in-flight reads can't store stale bodies
+_CACHE_LOCK = threading.Lock()
+
+def cache_get(todo_id=None):
+    """Return (body or None, generation); pass the generation back to cache_put."""
+    if not CACHE_ENABLED:
+        return None, None
+    with _CACHE_LOCK:
+        if todo_id is None:
+            return _LIST_CACHE, _CACHE_GEN
+        body = _ITEM_CACHE.get(todo_id)
+        if body is not None:
+            _ITEM_CACHE.move_to_end(todo_id)
+        return body, _CACHE_GEN
+
+def cache_put(gen, body, todo_id=None):
+    global _LIST_CACHE
+    if not CACHE_ENABLED:
+        return
+    with _CACHE_LOCK:
+        if gen != _CACHE_GEN:
+            return
+        if todo_id is None:
+            _LIST_CACHE = body
+        else:
+            _ITEM_CACHE[todo_id] = body
+            if len(_ITEM_CACHE) > CACHE_MAX:
+                _ITEM_CACHE.popitem(last=False)
+
+def invalidate(todo_id=None):
+    """Forget the list body and, if given, one todo's body. Call after commit."""
+    global _LIST_CACHE, _CACHE_GEN
+    with _CACHE_LOCK:
+        _CACHE_GEN += 1
+        _LIST_CACHE = None
+        if todo_id is not None:
+            _ITEM_CACHE.pop(todo_id, None)
 
 # ── HTTP handler ───────────────────────────────────────────────────────────────
 
+# Every response shares these headers; only status, length, Connection and
+# any extra header lines (e.g. ETag) vary.
+_HEADERS = (
+    b"HTTP/1.1 %d %s\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: %d\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET, POST, PUT, DELETE, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: Content-Type\r\n"
+    b"Connection: %s\r\n"
+    b"%s"
+    b"\r\n"
+)
+_REASON = {s.value: s.phrase.encode() for s in HTTPStatus}
+
+# One slot per pooled connection, held for the duration of a request (not a
+# keep-alive connection, which may sit idle): surplus requests wait here
+# instead of queueing inside the pool or exhausting it.
+_WORKERS = threading.BoundedSemaphore(POOL_SIZE)
+
 class Handler(BaseHTTPRequestHandler):
 
+    protocol_version = "HTTP/1.1"
+    timeout          = 5        # seconds an idle keep-alive connection is kept open
+    _body_read       = False
+
     def _send(self, code, data):
-        body = json.dumps(data, default=str).encode()
-        self.send_response(code)
-        self.send_header("Content-Type",   "application/json")
-        self.send_header("Content-Length", len(body))
-        self.send_header("Access-Control-Allow-Origin",  "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
-        self.wfile.write(body)
-
-    def _body(self):
-        n = int(self.headers.get("Content-Length", 0))
-        return json.loads(self.rfile.read(n)) if n else {}
+        self._send_body(code, dumps(data))
+
+    def _send_body(self, code, body, extra=b""):
+        """Send an already-encoded JSON body as a single socket write.
+
+        A 304 sends the headers of `body` (its length included) without it.
+        """
+        if not self._body_read and self.headers.get("Content-Length"):
+            self._raw_body()   # drain it, or it would be parsed as the next request
+        self._body_read = False
+        self.log_request(code)
+        # parse_request() already decided from the request's version and
+        # Connection header whether this socket stays open; tell the client
+        conn = b"close" if self.close_connection else b"keep-alive"
+        head = _HEADERS % (code, _REASON[code], len(body), conn, extra)
+        self.wfile.write(head if code == 304 else head + body)
+
+    def _raw_body(self):
+        """Read the request body, closing the connection if it can't be read fully."""
+        self._body_read = True
+        cl = self.headers.get("Content-Length")
+        try:
+            n = int(cl) if cl else 0
+        except ValueError:
+            n = -1
+        if n < 0 or "Transfer-Encoding" in self.headers:
+            # Chunked or malformed framing isn't decoded here, so whatever
+            # follows on the socket can't be trusted as the next request
+            self.close_connection = True
+            return b""
+        raw = self.rfile.read(n) if n else b""
+        if len(raw) < n:
+            self.close_connection = True
+        return raw
 
     def log_message(self, fmt, *args):
         print(f"  {self.command:7s}  {self.path}  →  {args[1]}")
 
-    def _parts(self):
-        return [p for p in self.path.strip("/").split("/") if p]
+    def log_error(self, fmt, *args):
+        if fmt.startswith("Request timed out"):
+            return   # an idle keep-alive connection reaching `timeout` is expected
+        print(f"  ⚠️   {fmt % args}")
 
     def do_OPTIONS(self):
-        self._send(204, {})
+        self._send_body(204, b"")
 
-    # GET /todos  or  GET /todos/<id>
-    def do_GET(self):
-        parts = self._parts()
-        if not parts or parts[0] != "todos":
+    def _todo_id(self):
+        """Tokenize the path once: (True, None) for /todos, (True, id) for /todos/<id>."""
+        p = self.path
+        if not p.startswith("/todos"):
+            return False, None
+        rest = p[6:].rstrip("/")
+        if not rest:
+            return True, None
+        digits = rest[1:]
+        # int() does the only full scan. isascii() is O(1) and the length cap
+        # keeps int() clear of its 4300-digit limit; beyond plain digits an
+        # ASCII int() also takes a sign ("+1", "-0") or "_" ("1_0").
+        if (rest[0] != "/" or len(digits) > 19 or not digits.isascii()
+                or not digits[:1].isdigit() or "_" in digits):
+            return False, None
+        try:
+            todo_id = int(digits)
+        except ValueError:
+            return False, None
+        return (True, todo_id) if todo_id <= MAX_ID else (False, None)
+
+    def _dispatch(self):
+        matched, todo_id = self._todo_id()
+        if not matched:
             return self._send(404, {"error": "Not found"})
-        ph = P()
-        with get_db() as conn:
-            if len(parts) == 2 and parts[1].isdigit():
-                row = fetchone(conn, f"SELECT * FROM todos WHERE id={ph}", (parts[1],))
-                return self._send(200, row) if row else self._send(404, {"error": "Todo not found"})
-            rows = fetchall(conn, "SELECT * FROM todos ORDER BY created DESC")
-            return self._send(200, rows)
+        route = self._ROUTES.get((self.command, todo_id is not None))
+        if route is None:
+            return self._send(400, {"error": self._USAGE[self.command]})
+        # Read the body before taking a slot: a slow upload must not hold one
+        raw = self._raw_body()
+        with _WORKERS:
+            route(self, todo_id, raw)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    # GET /todos — polling clients revalidate with If-None-Match and get a bodiless 304
+    def _list(self, _, __):
+        cached, gen = cache_get()
+        if cached is None:
+            with borrow() as conn:
+                body = dump_rows(execute(conn, SQL["list"]))
+            # The tag hashes the body itself: row count and max id would not
+            # change when a PUT edits a title.
+            etag   = b'"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest().encode()
+            cached = etag, body
+            cache_put(gen, cached)
+        etag, body = cached
+        extra = b"ETag: %s\r\nCache-Control: no-cache\r\n" % etag
+        if etag.decode() in self.headers.get("If-None-Match", ""):
+            return self._send_body(304, body, extra)
+        self._send_body(200, body, extra)
+
+    # GET /todos/<id>
+    def _get(self, todo_id, _):
+        body, gen = cache_get(todo_id)
+        if body is None:
+            with borrow() as conn:
+                row = fetchone(conn, SQL["get"], (todo_id,))
+            if not row:
+                return self._send(404, {"error": "Todo not found"})
+            body = dumps(row)
+            cache_put(gen, body, todo_id)
+        self._send_body(200, body)
 
     # POST /todos
-    def do_POST(self):
-        if not self.path.startswith("/todos"):
-            return self._send(404, {"error": "Not found"})
-        title = (self._body().get("title") or "").strip()
+    def _create(self, _, raw):
+        # Bodies without a title key can be rejected before parsing them
+        title = (loads(raw).get("title") or "").strip() if b'"title"' in raw else ""
         if not title:
             return self._send(400, {"error": "title is required"})
-        ph = P()
-        with get_db() as conn:
-            if DATABASE_URL:
-                cur = execute(conn, f"INSERT INTO todos (title) VALUES ({ph}) RETURNING *", (title,))
-                row = dict(zip([d[0] for d in cur.description], cur.fetchone()))
-            else:
-                cur = execute(conn, f"INSERT INTO todos (title) VALUES ({ph})", (title,))
-                row = fetchone(conn, f"SELECT * FROM todos WHERE id={ph}", (cur.lastrowid,))
-            conn.commit()
+        row = write(insert_todo, title)
+        invalidate()
         self._send(201, row)
 
     # PUT /todos/<id>
-    def do_PUT(self):
-        parts = self._parts()
-        if len(parts) != 2 or not parts[1].isdigit():
-            return self._send(400, {"error": "PUT /todos/<id>"})
-        ph = P()
-        with get_db() as conn:
-            row = fetchone(conn, f"SELECT * FROM todos WHERE id={ph}", (parts[1],))
-            if not row:
-                return self._send(404, {"error": "Todo not found"})
-            body      = self._body()
-            title     = body.get("title",     row["title"])
-            completed = body.get("completed", row["completed"])
-            if DATABASE_URL:
-                cur = execute(conn,
-                    f"UPDATE todos SET title={ph}, completed={ph} WHERE id={ph} RETURNING *",
-                    (title, bool(completed), parts[1]))
-                updated = dict(zip([d[0] for d in cur.description], cur.fetchone()))
-            else:
-                execute(conn,
-                    f"UPDATE todos SET title={ph}, completed={ph} WHERE id={ph}",
-                    (title, int(bool(completed)), parts[1]))
-                updated = fetchone(conn, f"SELECT * FROM todos WHERE id={ph}", (parts[1],))
-            conn.commit()
+    def _update(self, todo_id, raw):
+        body      = loads(raw) if raw else {}
+        title     = body.get("title")
+        completed = body.get("completed")
+        if completed is not None:
+            completed = bool(completed) if DATABASE_URL else int(bool(completed))
+        updated = write(update_todo, todo_id, title, completed)
+        if not updated:
+            return self._send(404, {"error": "Todo not found"})
+        invalidate(todo_id)
         self._send(200, updated)
 
     # DELETE /todos/<id>
-    def do_DELETE(self):
-        parts = self._parts()
-        if len(parts) != 2 or not parts[1].isdigit():
-            return self._send(400, {"error": "DELETE /todos/<id>"})
-        ph = P()
-        with get_db() as conn:
-            cur = execute(conn, f"DELETE FROM todos WHERE id={ph}", (parts[1],))
-            conn.commit()
-        if cur.rowcount == 0:
+    def _delete(self, todo_id, _):
+        deleted = write(delete_todo, todo_id)
+        invalidate(todo_id)
+        if not deleted:
             return self._send(404, {"error": "Todo not found"})
-        self._send(200, {"deleted": int(parts[1])})
+        self._send(200, {"deleted": todo_id})
+
+    # (method, has id) → handler
+    _ROUTES = {
+        ("GET",    False): _list,
+        ("GET",    True):  _get,
+        ("POST",   False): _create,
+        ("PUT",    True):  _update,
+        ("DELETE", True):  _delete,
+    }
+    _USAGE = {
+        "POST":   "POST /todos",
+        "PUT":    "PUT /todos/<id>",
+        "DELETE": "DELETE /todos/<id>",
+    }
+
+
+# ── Server ────────────────────────────────────────────────────────────────────
+
+class Server(ThreadingHTTPServer):
+    """Thread-per-connection server; Handler caps how many requests run at once."""
+
+    daemon_threads     = True
+    request_queue_size = 128
 
 
 # ── Entry point ───────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
     init_db()
-    server = HTTPServer(("0.0.0.0", 5000), Handler)
+    server = Server(("0.0.0.0", 5000), Handler)
     print("🚀  Backend running  →  http://0.0.0.0:5000")
     try:
         server.serve_forever()
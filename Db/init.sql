@@ -9,6 +9,9 @@ CREATE TABLE IF NOT EXISTS todos (
     created   TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- Lets GET /todos (ORDER BY created DESC) walk the index instead of sorting
+CREATE INDEX IF NOT EXISTS idx_todos_created ON todos (created DESC);
+
 -- Optional: seed a couple of sample rows on first boot
 INSERT INTO todos (title) VALUES
     ('Dockerize the app ✅'),